@@ -5,11 +5,16 @@ Polygon Prism Net Generator
 Generates 3D prism nets from SVG polygon patterns for paper craft models.
 """
 
+import math
+import os
 import typer
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Tuple
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from shapely.geometry import Polygon
 
 from src.svg_parser import SVGParser
 from src.geometry import GeometryProcessor
@@ -19,6 +24,9 @@ from src.net_generator import NetGenerator
 app = typer.Typer(help="Generate 3D prism nets from SVG polygon patterns")
 console = Console()
 
+# Nets handed to a worker process at a time
+RENDER_CHUNKSIZE = 8
+
 
 def parse_color_mapping(colors_str: str) -> Dict[str, float]:
     """Parse color-height mapping from CLI string format."""
@@ -29,6 +37,36 @@ def parse_color_mapping(colors_str: str) -> Dict[str, float]:
     return color_map
 
 
+def _render_one(item: Tuple[int, Tuple[Polygon, float]], output_dir: Path) -> None:
+    """Generate and write the prism net for one (index, (polygon, height)) item."""
+    i, (polygon, height) = item
+    net_svg = NetGenerator().generate_net(polygon, height)
+    output_file = output_dir / f"prism_net_{i+1}.svg"
+    
+    with open(output_file, 'w') as f:
+        f.write(net_svg)
+
+
+def _progress() -> Progress:
+    """Create the spinner progress display used for each pipeline phase."""
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    )
+
+
+def _track_rendering(results: Iterable[None], count: int) -> int:
+    """Consume render results under a progress display and return the number of nets."""
+    with _progress() as progress:
+        task = progress.add_task("Generating prism nets...", total=None)
+        for _ in results:
+            pass
+        progress.update(task, description=f"Generated {count} prism nets")
+    
+    return count
+
+
 @app.command()
 def generate(
     input_file: Path = typer.Argument(..., help="Input SVG file path"),
@@ -55,16 +93,12 @@ def generate(
     
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
+    with _progress() as progress:
         
         # Parse SVG
         task = progress.add_task("Parsing SVG file...", total=None)
         parser = SVGParser(tolerance=tolerance)
-        line_segments = parser.parse_svg(input_file)
+        line_segments, svg_colors = parser.parse_svg_with_colors(input_file)
         progress.update(task, description=f"Found {len(line_segments)} line segments")
         
         # Detect polygons
@@ -76,24 +110,23 @@ def generate(
         # Map colors to heights
         task = progress.add_task("Mapping colors to heights...", total=None)
         color_mapper = ColorMapper(color_mapping)
-        polygon_heights = color_mapper.map_polygon_heights(polygons, input_file)
+        polygon_heights = color_mapper.map_polygon_heights(polygons, svg_colors)
         progress.update(task, description=f"Mapped heights for {len(polygon_heights)} polygons")
-        
-        # Generate nets
-        task = progress.add_task("Generating prism nets...", total=None)
-        net_generator = NetGenerator()
-        generated_count = 0
-        
-        for i, (polygon, height) in enumerate(polygon_heights):
-            net_svg = net_generator.generate_net(polygon, height)
-            output_file = output_dir / f"prism_net_{i+1}.svg"
-            
-            with open(output_file, 'w') as f:
-                f.write(net_svg)
-            
-            generated_count += 1
-        
-        progress.update(task, description=f"Generated {generated_count} prism nets")
+    
+    # Generate nets; each is independent, so spread them over worker processes
+    # when there is more than one chunk of work
+    render = partial(_render_one, output_dir=output_dir)
+    items = enumerate(polygon_heights)
+    max_workers = min(os.cpu_count() or 1, math.ceil(len(polygon_heights) / RENDER_CHUNKSIZE))
+    
+    if max_workers > 1:
+        # map submits every task up front, so the workers start before the
+        # progress display's refresh thread does
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(render, items, chunksize=RENDER_CHUNKSIZE)
+            generated_count = _track_rendering(results, len(polygon_heights))
+    else:
+        generated_count = _track_rendering(map(render, items), len(polygon_heights))
     
     console.print(f"[green]✓ Successfully generated {generated_count} prism nets in {output_dir}[/green]")
 
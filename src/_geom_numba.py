@@ -0,0 +1,218 @@
+"""
+Numba Geometry Kernels
+
+JIT-compiled numeric helpers used by the geometry processor. Public kernels
+are compiled eagerly from explicit signatures so the first call does not pay
+the JIT warmup cost.
+"""
+
+import math
+import numpy as np
+from numba import njit
+
+
+@njit("b1(f8, f8, f8, f8, f8, f8, f8)", cache=True, fastmath=True, inline='always')
+def point_on_segment(px, py, x1, y1, x2, y2, tolerance):
+    """Check if point (px, py) lies on segment (x1, y1)-(x2, y2)."""
+    # Check if point is collinear with segment
+    cross_product = (py - y1) * (x2 - x1) - (px - x1) * (y2 - y1)
+
+    if abs(cross_product) > tolerance:
+        return False
+
+    # Check if point is within segment bounds
+    return (min(x1, x2) - tolerance <= px <= max(x1, x2) + tolerance and
+            min(y1, y2) - tolerance <= py <= max(y1, y2) + tolerance)
+
+
+@njit("f8(f8[:, :])", cache=True, fastmath=True)
+def polygon_area(vertices):
+    """Calculate the area of an (n, 2) polygon vertex array using the shoelace formula."""
+    n = vertices.shape[0]
+    area = 0.0
+
+    for i in range(n):
+        j = (i + 1) % n
+        area += vertices[i, 0] * vertices[j, 1] - vertices[j, 0] * vertices[i, 1]
+
+    return abs(area) / 2
+
+
+@njit("UniTuple(f8, 2)(f8[:, :])", cache=True, fastmath=True)
+def polygon_centroid(vertices):
+    """Calculate the centroid of an (n, 2) polygon vertex array."""
+    area = polygon_area(vertices)
+    if area == 0:
+        return 0.0, 0.0
+
+    n = vertices.shape[0]
+    cx = 0.0
+    cy = 0.0
+
+    for i in range(n):
+        j = (i + 1) % n
+        factor = vertices[i, 0] * vertices[j, 1] - vertices[j, 0] * vertices[i, 1]
+        cx += (vertices[i, 0] + vertices[j, 0]) * factor
+        cy += (vertices[i, 1] + vertices[j, 1]) * factor
+
+    return cx / (6 * area), cy / (6 * area)
+
+
+# Exact comparisons decide boundary cases here, so fastmath is left off
+@njit("b1(f8, f8, f8[:, :])", cache=True)
+def point_in_polygon(x, y, vertices):
+    """Check if point (x, y) is inside an (n, 2) polygon vertex array by ray casting."""
+    n = vertices.shape[0]
+    inside = False
+
+    for i in range(n):
+        x1, y1 = vertices[i, 0], vertices[i, 1]
+        x2, y2 = vertices[(i + 1) % n, 0], vertices[(i + 1) % n, 1]
+
+        # Edges whose y-range (min, max] contains the ray
+        if (y1 < y) != (y2 < y) and x <= max(x1, x2):
+            xinters = (y - y1) * (x2 - x1) / (y2 - y1) + x1
+            if x <= xinters:
+                inside = not inside
+
+    return inside
+
+
+@njit(cache=True)
+def _choose_rightmost_neighbor(offsets, neighbors, edge_ids, slot_angles, visited_edges,
+                               in_path, incoming_slot, current):
+    """
+    Choose the unvisited neighbor slot of `current` that makes the smallest clockwise angle.
+
+    Returns:
+        CSR slot of the chosen neighbor, or -1 if every neighbor is visited
+    """
+    incoming_angle = slot_angles[incoming_slot]
+
+    best_slot = -1
+    best_angle = math.inf
+
+    for slot in range(offsets[current], offsets[current + 1]):
+        if visited_edges[edge_ids[slot]] or in_path[neighbors[slot]]:
+            continue
+
+        # Calculate clockwise angle difference
+        angle_diff = (slot_angles[slot] - incoming_angle) % (2 * math.pi)
+
+        if angle_diff < best_angle:
+            best_angle = angle_diff
+            best_slot = slot
+
+    return best_slot
+
+
+@njit(cache=True)
+def _find_cycle_from_edge(offsets, neighbors, edge_ids, slot_angles, visited_edges, in_path,
+                          path, path_edges, start, first_slot):
+    """
+    Walk from the edge in CSR slot `first_slot` of `start`, always turning rightmost.
+
+    The cycle nodes are written to `path`; its edges are marked visited when the walk
+    returns to `start`.
+
+    Returns:
+        Number of nodes in the cycle, or 0 if the walk dead-ends
+    """
+    current = neighbors[first_slot]
+    incoming_slot = first_slot
+    path[0] = start
+    path[1] = current
+    path_edges[0] = edge_ids[first_slot]
+    length = 2
+    in_path[start] = True
+    in_path[current] = True
+    found = False
+
+    while True:
+        # Check if we can return to start through an unvisited edge
+        if length >= 3:
+            closing_edge = -1
+            for slot in range(offsets[current], offsets[current + 1]):
+                if neighbors[slot] == start:
+                    closing_edge = edge_ids[slot]
+                    break
+
+            if closing_edge >= 0 and not visited_edges[closing_edge]:
+                # Found a cycle
+                for i in range(length - 1):
+                    visited_edges[path_edges[i]] = True
+                visited_edges[closing_edge] = True
+                found = True
+                break
+
+        slot = _choose_rightmost_neighbor(offsets, neighbors, edge_ids, slot_angles,
+                                          visited_edges, in_path, incoming_slot, current)
+        if slot < 0:
+            break
+
+        current = neighbors[slot]
+        incoming_slot = slot
+        path[length] = current
+        path_edges[length - 1] = edge_ids[slot]
+        in_path[current] = True
+        length += 1
+
+    for i in range(length):
+        in_path[path[i]] = False
+
+    return length if found else 0
+
+
+@njit("Tuple((i4[:], i8[:]))(i4[:], i4[:], i4[:], f8[:], i8)", cache=True)
+def find_cycles(offsets, neighbors, edge_ids, slot_angles, n_edges):
+    """
+    Find cycles in an undirected graph stored in CSR form.
+
+    Args:
+        offsets: (N + 1,) start of each node's neighbor slots
+        neighbors: Neighbor node of each slot
+        edge_ids: Undirected edge id of each slot
+        slot_angles: Direction angle from each node to the neighbor in each slot
+        n_edges: Number of distinct undirected edges
+
+    Returns:
+        Tuple of (cycle_nodes, cycle_offsets); cycle i is
+        cycle_nodes[cycle_offsets[i]:cycle_offsets[i + 1]]
+    """
+    n_nodes = offsets.shape[0] - 1
+    visited_edges = np.zeros(n_edges, dtype=np.bool_)
+    in_path = np.zeros(n_nodes, dtype=np.bool_)
+    path = np.empty(n_nodes + 1, dtype=np.int32)
+    path_edges = np.empty(n_nodes + 1, dtype=np.int32)
+
+    cycle_nodes = np.empty(max(n_edges, 16), dtype=np.int32)
+    cycle_offsets = np.zeros(max(n_edges, 16) + 1, dtype=np.int64)
+    n_cycles = 0
+
+    for start in range(n_nodes):
+        for slot in range(offsets[start], offsets[start + 1]):
+            if visited_edges[edge_ids[slot]]:
+                continue
+
+            length = _find_cycle_from_edge(offsets, neighbors, edge_ids, slot_angles,
+                                           visited_edges, in_path, path, path_edges,
+                                           start, slot)
+            if length < 3:
+                continue
+
+            # Grow output buffers geometrically
+            end = cycle_offsets[n_cycles]
+            if end + length > cycle_nodes.shape[0]:
+                grown = np.empty(2 * (end + length), dtype=np.int32)
+                grown[:end] = cycle_nodes[:end]
+                cycle_nodes = grown
+            if n_cycles + 2 > cycle_offsets.shape[0]:
+                grown_offsets = np.zeros(2 * cycle_offsets.shape[0], dtype=np.int64)
+                grown_offsets[:n_cycles + 1] = cycle_offsets[:n_cycles + 1]
+                cycle_offsets = grown_offsets
+
+            cycle_nodes[end:end + length] = path[:length]
+            n_cycles += 1
+            cycle_offsets[n_cycles] = end + length
+
+    return cycle_nodes[:cycle_offsets[n_cycles]], cycle_offsets[:n_cycles + 1]
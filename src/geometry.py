@@ -4,11 +4,13 @@ Geometry Processing Module
 Handles intersection detection and polygon formation from line segments.
 """
 
-from typing import List, Tuple, Set, Optional
+from typing import List, Tuple, Union
 import numpy as np
+import shapely
 from shapely.geometry import Point, LineString, Polygon
 from shapely.ops import unary_union
-import itertools
+
+from ._geom_numba import find_cycles, point_on_segment
 
 
 class GeometryProcessor:
@@ -22,21 +24,27 @@ class GeometryProcessor:
             tolerance: Tolerance for intersection detection and point matching
         """
         self.tolerance = tolerance
-        self.intersections: Set[complex] = set()
-        self.segments: List[Tuple[complex, complex]] = []
+        self.intersections: np.ndarray = np.empty((0, 2), dtype=np.float64)
+        self.intersections_by_seg: List[np.ndarray] = []
+        self.seg_xy: np.ndarray = np.empty((0, 4), dtype=np.float64)
     
-    def find_polygons(self, line_segments: List[Tuple[complex, complex]]) -> List[Polygon]:
+    def find_polygons(self, line_segments: Union[np.ndarray, List[Tuple[complex, complex]]]) -> List[Polygon]:
         """
         Find all polygons formed by intersecting line segments.
         
         Args:
-            line_segments: List of line segments as (start, end) complex number pairs
+            line_segments: (N, 2) complex array or list of line segments as
+                (start, end) complex number pairs
             
         Returns:
             List of Shapely Polygon objects
         """
-        self.segments = line_segments
-        self.intersections = set()
+        # Store segments as contiguous rows of (x1, y1, x2, y2)
+        segments = np.asarray(line_segments, dtype=np.complex128).reshape(-1, 2)
+        self.seg_xy = np.column_stack((segments[:, 0].real, segments[:, 0].imag,
+                                       segments[:, 1].real, segments[:, 1].imag))
+        self.intersections = np.empty((0, 2), dtype=np.float64)
+        self.intersections_by_seg = []
         
         # Find all intersection points
         self._find_intersections()
@@ -57,253 +65,193 @@ class GeometryProcessor:
     
     def _find_intersections(self) -> None:
         """Find all intersection points between line segments."""
-        for i, seg1 in enumerate(self.segments):
-            for j, seg2 in enumerate(self.segments[i + 1:], i + 1):
-                intersection = self._line_intersection(seg1, seg2)
-                if intersection is not None:
-                    self.intersections.add(intersection)
+        rows, cols = self._candidate_pairs()
+        x1, y1, x2, y2 = self.seg_xy.T
+        
+        # Parametric intersection of each candidate pair (rows[k], cols[k])
+        dx1 = x1 - x2
+        dy1 = y1 - y2
+        denom = dx1[rows] * dy1[cols] - dy1[rows] * dx1[cols]
+        dx13 = x1[rows] - x1[cols]
+        dy13 = y1[rows] - y1[cols]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (dx13 * dy1[cols] - dy13 * dx1[cols]) / denom
+            u = -(dx1[rows] * dy13 - dy1[rows] * dx13) / denom
+        
+        # Non-parallel pairs whose intersection lies within both segments
+        hits = ((np.abs(denom) >= self.tolerance) &
+                (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1))
+        rows, cols = rows[hits], cols[hits]
+        t_hits = t[hits]
+        
+        xs = x1[rows] + t_hits * (x2[rows] - x1[rows])
+        ys = y1[rows] + t_hits * (y2[rows] - y1[rows])
+        points = np.column_stack((xs, ys))
+        self.intersections = np.unique(points, axis=0)
+        
+        # Scatter each hit onto both of its segments, grouped by segment index
+        segment_ids = np.concatenate((rows, cols))
+        order = np.argsort(segment_ids, kind='stable')
+        bounds = np.searchsorted(segment_ids[order], np.arange(len(self.seg_xy) + 1))
+        grouped = np.vstack((points, points))[order]
+        self.intersections_by_seg = [grouped[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
     
-    def _line_intersection(self, seg1: Tuple[complex, complex], 
-                          seg2: Tuple[complex, complex]) -> Optional[complex]:
+    def _candidate_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Find intersection point between two line segments.
+        Find segment pairs whose axis-aligned bounding boxes overlap.
         
-        Args:
-            seg1: First line segment (start, end)
-            seg2: Second line segment (start, end)
-            
         Returns:
-            Intersection point as complex number, or None if no intersection
+            Tuple of (rows, cols) segment indices with rows < cols
         """
-        p1, p2 = seg1
-        p3, p4 = seg2
-        
-        # Convert to real coordinates for calculation
-        x1, y1 = p1.real, p1.imag
-        x2, y2 = p2.real, p2.imag
-        x3, y3 = p3.real, p3.imag
-        x4, y4 = p4.real, p4.imag
-        
-        # Calculate intersection using parametric form
-        denom = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
-        
-        if abs(denom) < self.tolerance:
-            # Lines are parallel
-            return None
-        
-        t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denom
-        u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denom
-        
-        # Check if intersection is within both segments
-        if 0 <= t <= 1 and 0 <= u <= 1:
-            x = x1 + t * (x2 - x1)
-            y = y1 + t * (y2 - y1)
-            return complex(x, y)
-        
-        return None
+        # Bounding-box query of every segment against an STRtree of all segments
+        lines = shapely.linestrings(self.seg_xy.reshape(-1, 2, 2))
+        tree = shapely.STRtree(lines)
+        first, second = tree.query(lines)
+        
+        # Skip self-pairs and keep each unordered pair once
+        unique = first < second
+        return first[unique], second[unique]
     
-    def _split_segments_at_intersections(self) -> List[Tuple[complex, complex]]:
-        """Split line segments at intersection points."""
+    def _split_segments_at_intersections(self) -> np.ndarray:
+        """Split line segments at intersection points into an (M, 4) array."""
         split_segments = []
         
-        for segment in self.segments:
-            start, end = segment
-            
-            # Find intersections on this segment
-            intersections_on_segment = []
-            for intersection in self.intersections:
-                if self._point_on_segment(intersection, segment):
-                    intersections_on_segment.append(intersection)
-            
-            # Add segment endpoints
-            intersections_on_segment.extend([start, end])
+        for segment, intersections_on_segment in zip(self.seg_xy, self.intersections_by_seg):
+            # Intersections found for this segment, plus the segment endpoints
+            points = np.vstack((intersections_on_segment, segment.reshape(2, 2)))
             
             # Sort points along the segment
-            intersections_on_segment = self._sort_points_along_segment(
-                intersections_on_segment, start, end
-            )
+            points = self._sort_points_along_segment(points, segment[:2], segment[2:])
             
-            # Create sub-segments
-            for i in range(len(intersections_on_segment) - 1):
-                p1 = intersections_on_segment[i]
-                p2 = intersections_on_segment[i + 1]
-                
-                if abs(p2 - p1) > self.tolerance:
-                    split_segments.append((p1, p2))
-        
-        return split_segments
+            # Create sub-segments, dropping those shorter than the tolerance
+            steps = np.diff(points, axis=0)
+            keep = np.hypot(steps[:, 0], steps[:, 1]) > self.tolerance
+            split_segments.append(np.hstack((points[:-1][keep], points[1:][keep])))
+        
+        if not split_segments:
+            return np.empty((0, 4), dtype=np.float64)
+        return np.vstack(split_segments)
     
-    def _point_on_segment(self, point: complex, segment: Tuple[complex, complex]) -> bool:
-        """Check if a point lies on a line segment."""
-        start, end = segment
-        
-        # Check if point is collinear with segment
-        cross_product = ((point.imag - start.imag) * (end.real - start.real) - 
-                        (point.real - start.real) * (end.imag - start.imag))
-        
-        if abs(cross_product) > self.tolerance:
-            return False
-        
-        # Check if point is within segment bounds
-        min_x, max_x = min(start.real, end.real), max(start.real, end.real)
-        min_y, max_y = min(start.imag, end.imag), max(start.imag, end.imag)
-        
-        return (min_x - self.tolerance <= point.real <= max_x + self.tolerance and
-                min_y - self.tolerance <= point.imag <= max_y + self.tolerance)
+    def _point_on_segment(self, point: np.ndarray, segment: np.ndarray) -> bool:
+        """Check if an (x, y) point lies on an (x1, y1, x2, y2) line segment."""
+        return point_on_segment(point[0], point[1], *segment, self.tolerance)
     
-    def _sort_points_along_segment(self, points: List[complex], 
-                                  start: complex, end: complex) -> List[complex]:
-        """Sort points along a line segment from start to end."""
-        def distance_from_start(point: complex) -> float:
-            return abs(point - start)
+    def _sort_points_along_segment(self, points: np.ndarray,
+                                  start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Sort unique (K, 2) points by their projection onto the segment from start to end."""
+        points = np.unique(points, axis=0)
+        projection = (points - start) @ (end - start)
         
-        return sorted(set(points), key=distance_from_start)
+        return points[np.argsort(projection, kind='stable')]
     
-    def _build_segment_graph(self, segments: List[Tuple[complex, complex]]) -> dict:
-        """Build a graph representation of connected segments."""
-        graph = {}
-        
-        for start, end in segments:
-            # Round coordinates to handle floating point precision
-            start_key = self._round_point(start)
-            end_key = self._round_point(end)
-            
-            if start_key not in graph:
-                graph[start_key] = []
-            if end_key not in graph:
-                graph[end_key] = []
-            
-            graph[start_key].append(end_key)
-            graph[end_key].append(start_key)
+    def _build_segment_graph(self, segments: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Build a CSR graph representation of connected (M, 4) segments.
         
-        return graph
+        Returns:
+            Tuple of (node_xy, offsets, neighbors, edge_ids): node coordinates, the start
+            of each node's neighbor slots, the neighbor node and undirected edge id of
+            each slot
+        """
+        # Round coordinates to handle floating point precision, then assign each
+        # unique point an integer id in order of first appearance
+        endpoints = self._round_point(segments).reshape(-1, 2)
+        node_ids = {}
+        endpoint_ids = np.fromiter(
+            (node_ids.setdefault(point, len(node_ids)) for point in map(tuple, endpoints.tolist())),
+            dtype=np.int32,
+            count=len(endpoints)
+        )
+        node_xy = np.array(list(node_ids), dtype=np.float64).reshape(-1, 2)
+        n_nodes = len(node_xy)
+        
+        # Each segment contributes a slot in both directions; a stable sort keeps
+        # every node's neighbors in segment order
+        starts, ends = endpoint_ids[0::2], endpoint_ids[1::2]
+        
+        # Segments shorter than the rounding collapse onto a single node; drop
+        # these self-loops so they never enter the cycle search
+        keep = starts != ends
+        starts, ends = starts[keep], ends[keep]
+        sources = np.column_stack((starts, ends)).ravel()
+        targets = np.column_stack((ends, starts)).ravel()
+        order = np.argsort(sources, kind='stable')
+        sources, targets = sources[order], targets[order]
+        
+        offsets = np.zeros(n_nodes + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n_nodes), out=offsets[1:])
+        
+        # Parallel slots between the same pair of nodes share an edge id
+        edge_keys = (np.minimum(sources, targets).astype(np.int64) * n_nodes +
+                     np.maximum(sources, targets))
+        edge_ids = np.unique(edge_keys, return_inverse=True)[1].astype(np.int32)
+        
+        return node_xy, offsets, targets, edge_ids
     
-    def _round_point(self, point: complex) -> complex:
-        """Round point coordinates to handle floating point precision."""
+    def _round_point(self, points: np.ndarray) -> np.ndarray:
+        """
+        Round point coordinates to handle floating point precision.
+        
+        Matches Python's correctly rounded round(); np.round scales by 10**precision
+        first, which misrounds values near a decimal half such as 0.35.
+        """
         precision = int(-np.log10(self.tolerance))
-        return complex(round(point.real, precision), round(point.imag, precision))
-    
-    def _find_cycles_in_graph(self, graph: dict) -> List[List[complex]]:
-        """Find all cycles (potential polygons) in the segment graph."""
-        cycles = []
-        visited_edges = set()
-        
-        for start_node in graph:
-            for neighbor in graph[start_node]:
-                edge = tuple(sorted([start_node, neighbor], key=lambda x: (x.real, x.imag)))
-                if edge in visited_edges:
-                    continue
-                
-                # Try to find cycles starting from this edge
-                cycle = self._find_cycle_from_edge(graph, start_node, neighbor, visited_edges)
-                if cycle and len(cycle) >= 3:
-                    cycles.append(cycle)
-        
-        return cycles
-    
-    def _find_cycle_from_edge(self, graph: dict, start: complex, current: complex,
-                             visited_edges: set) -> Optional[List[complex]]:
-        """Find a cycle starting from a specific edge using DFS."""
-        path = [start, current]
-        visited_nodes = {start, current}
-        
-        while True:
-            # Get unvisited neighbors of current node
-            neighbors = []
-            for neighbor in graph[current]:
-                edge = tuple(sorted([current, neighbor], key=lambda x: (x.real, x.imag)))
-                if edge not in visited_edges and neighbor not in visited_nodes:
-                    neighbors.append(neighbor)
-            
-            # Also check if we can return to start
-            if start in graph[current]:
-                edge = tuple(sorted([current, start], key=lambda x: (x.real, x.imag)))
-                if edge not in visited_edges and len(path) >= 3:
-                    # Found a cycle
-                    for i in range(len(path) - 1):
-                        edge = tuple(sorted([path[i], path[i + 1]], key=lambda x: (x.real, x.imag)))
-                        visited_edges.add(edge)
-                    edge = tuple(sorted([current, start], key=lambda x: (x.real, x.imag)))
-                    visited_edges.add(edge)
-                    return path
-            
-            if not neighbors:
-                break
-            
-            # Choose the neighbor that makes the smallest angle (rightmost turn)
-            if len(neighbors) == 1:
-                next_node = neighbors[0]
-            else:
-                next_node = self._choose_rightmost_neighbor(current, path[-2], neighbors)
-            
-            path.append(next_node)
-            visited_nodes.add(next_node)
-            current = next_node
+        rounded = np.round(points, precision)
         
-        return None
+        # Only scaled values close to a half can round differently
+        scaled = points * 10.0 ** precision
+        halfway = np.isclose(np.abs(scaled - np.trunc(scaled)), 0.5)
+        rounded[halfway] = [round(value, precision) for value in points[halfway].tolist()]
+        return rounded
     
-    def _choose_rightmost_neighbor(self, current: complex, previous: complex,
-                                  neighbors: List[complex]) -> complex:
-        """Choose the neighbor that makes the smallest clockwise angle."""
-        incoming_vector = current - previous
-        incoming_angle = np.angle(incoming_vector)
-        
-        best_neighbor = neighbors[0]
-        best_angle = float('inf')
-        
-        for neighbor in neighbors:
-            outgoing_vector = neighbor - current
-            outgoing_angle = np.angle(outgoing_vector)
-            
-            # Calculate clockwise angle difference
-            angle_diff = (outgoing_angle - incoming_angle) % (2 * np.pi)
-            
-            if angle_diff < best_angle:
-                best_angle = angle_diff
-                best_neighbor = neighbor
+    def _find_cycles_in_graph(self, graph: Tuple[np.ndarray, ...]) -> List[np.ndarray]:
+        """Find all cycles (potential polygons) in the segment graph as (k, 2) coordinates."""
+        node_xy, offsets, neighbors, edge_ids = graph
+        n_edges = int(edge_ids.max()) + 1 if len(edge_ids) else 0
+        
+        # Direction of every slot's edge; computed with NumPy so angle ties break
+        # exactly as np.angle does
+        sources = np.repeat(np.arange(len(node_xy)), np.diff(offsets))
+        directions = node_xy[neighbors] - node_xy[sources]
+        slot_angles = np.arctan2(directions[:, 1], directions[:, 0])
         
-        return best_neighbor
+        cycle_nodes, cycle_offsets = find_cycles(offsets, neighbors, edge_ids, slot_angles, n_edges)
+        
+        cycle_xy = node_xy[cycle_nodes]
+        return [cycle_xy[begin:end] for begin, end in zip(cycle_offsets[:-1], cycle_offsets[1:])]
     
-    def _validate_polygons(self, cycles: List[List[complex]]) -> List[Polygon]:
+    def _validate_polygons(self, cycles: List[np.ndarray]) -> List[Polygon]:
         """Validate and convert cycles to Shapely polygons."""
-        valid_polygons = []
-        
-        for cycle in cycles:
-            try:
-                # Convert to coordinate pairs
-                coords = [(p.real, p.imag) for p in cycle]
-                
-                # Create Shapely polygon
-                polygon = Polygon(coords)
-                
-                # Validate polygon
-                if (polygon.is_valid and 
-                    not polygon.is_empty and 
-                    polygon.area > self.tolerance and
-                    len(coords) <= 6):  # Max 6 sides as specified
-                    
-                    valid_polygons.append(polygon)
-                    
-            except Exception:
-                # Skip invalid polygons
-                continue
+        # Max 6 sides as specified
+        cycles = [cycle for cycle in cycles if len(cycle) <= 6]
+        if not cycles:
+            return []
+        
+        # Build all polygons in one call from a flat coordinate array
+        coords = np.concatenate(cycles)
+        ring_indices = np.repeat(np.arange(len(cycles)), [len(cycle) for cycle in cycles])
+        polygons = shapely.polygons(shapely.linearrings(coords, indices=ring_indices))
+        
+        # Validate polygons
+        is_valid = (shapely.is_valid(polygons) &
+                    ~shapely.is_empty(polygons) &
+                    (shapely.area(polygons) > self.tolerance))
+        valid_polygons = polygons[is_valid].tolist()
         
         # Remove nested polygons
         return self._remove_nested_polygons(valid_polygons)
     
     def _remove_nested_polygons(self, polygons: List[Polygon]) -> List[Polygon]:
         """Remove polygons that are nested inside other polygons."""
-        filtered_polygons = []
+        if not polygons:
+            return []
         
-        for i, poly1 in enumerate(polygons):
-            is_nested = False
-            
-            for j, poly2 in enumerate(polygons):
-                if i != j and poly2.contains(poly1):
-                    is_nested = True
-                    break
-            
-            if not is_nested:
-                filtered_polygons.append(poly1)
+        # Query pairs (i, j) where polygon i lies within polygon j
+        tree = shapely.STRtree(polygons)
+        inner, outer = tree.query(polygons, predicate='within')
+        
+        is_nested = np.zeros(len(polygons), dtype=bool)
+        is_nested[inner[inner != outer]] = True
         
-        return filtered_polygons
\ No newline at end of file
+        return [polygon for polygon, nested in zip(polygons, is_nested) if not nested]
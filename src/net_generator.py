@@ -4,12 +4,32 @@ Net Generator Module
 Generates printable prism nets with flaps from polygons and heights.
 """
 
-from typing import List, Tuple, Dict
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Optional
 import numpy as np
 import math
-from shapely.geometry import Polygon, Point, LineString
-from shapely.affinity import translate, rotate
-import svgwrite
+from shapely.geometry import Polygon
+
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+
+def _fmt(value: float) -> str:
+    """Format an SVG coordinate or length to 2 decimals."""
+    return f'{value:.2f}'
+
+
+@dataclass
+class Shape:
+    """Polygon of a net layout stored as an (k, 2) array of its open ring."""
+    coords: np.ndarray
+    
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """Bounding box as (min_x, min_y, max_x, max_y)."""
+        min_x, min_y = self.coords.min(axis=0)
+        max_x, max_y = self.coords.max(axis=0)
+        return (min_x, min_y, max_x, max_y)
 
 
 class NetGenerator:
@@ -31,11 +51,11 @@ class NetGenerator:
         Returns:
             SVG string of the net
         """
-        # Calculate flap dimensions
-        flap_width = self._calculate_flap_width(polygon)
+        # Get polygon vertices once for every step
+        vertices = np.asarray(polygon.exterior.coords)[:-1]  # Remove duplicate last point
         
-        # Get polygon vertices
-        vertices = list(polygon.exterior.coords)[:-1]  # Remove duplicate last point
+        # Calculate flap dimensions
+        flap_width = self._calculate_flap_width(polygon, vertices)
         
         # Generate side faces
         side_faces = self._generate_side_faces(vertices, height)
@@ -44,260 +64,170 @@ class NetGenerator:
         flaps = self._generate_flaps(vertices, height, flap_width)
         
         # Layout the net
-        net_layout = self._layout_net(polygon, side_faces, flaps)
+        net_layout = self._layout_net(vertices, side_faces, flaps)
         
         # Create SVG
         svg_content = self._create_svg(net_layout)
         
         return svg_content
     
-    def _calculate_flap_width(self, polygon: Polygon) -> float:
+    def _calculate_flap_width(self, polygon: Polygon, 
+                              vertices: Optional[np.ndarray] = None) -> float:
         """Calculate flap width as shortest distance from edge midpoint to center ÷ 3."""
         centroid = polygon.centroid
-        vertices = list(polygon.exterior.coords)[:-1]
-        
-        min_distance = float('inf')
+        if vertices is None:
+            vertices = np.asarray(polygon.exterior.coords)[:-1]
         
-        for i in range(len(vertices)):
-            # Get edge midpoint
-            p1 = Point(vertices[i])
-            p2 = Point(vertices[(i + 1) % len(vertices)])
-            midpoint = Point((p1.x + p2.x) / 2, (p1.y + p2.y) / 2)
-            
-            # Calculate distance to centroid
-            distance = midpoint.distance(centroid)
-            min_distance = min(min_distance, distance)
+        # Edge midpoints and their distances to the centroid
+        midpoints = 0.5 * (vertices + np.roll(vertices, -1, axis=0))
+        distances = np.hypot(midpoints[:, 0] - centroid.x, midpoints[:, 1] - centroid.y)
         
-        return min_distance / 3
+        return float(distances.min()) / 3
     
     def _generate_side_faces(self, vertices: List[Tuple[float, float]], 
-                           height: float) -> List[Polygon]:
-        """Generate side face rectangles for the prism."""
-        side_faces = []
-        
-        for i in range(len(vertices)):
-            p1 = vertices[i]
-            p2 = vertices[(i + 1) % len(vertices)]
-            
-            # Calculate edge length
-            edge_length = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-            
-            # Create rectangle for this side face
-            face_coords = [
-                (0, 0),
-                (edge_length, 0),
-                (edge_length, height),
-                (0, height)
-            ]
-            
-            side_face = Polygon(face_coords)
-            side_faces.append(side_face)
+                           height: float) -> np.ndarray:
+        """Generate side face rectangles for the prism as an (n, 4, 2) coordinate array."""
+        vertices = np.asarray(vertices, dtype=np.float64)
         
-        return side_faces
-    
-    def _generate_flaps(self, vertices: List[Tuple[float, float]], 
-                       height: float, flap_width: float) -> List[List[Polygon]]:
-        """Generate flaps for each side face with alternating pattern."""
-        flaps = []
+        # Calculate edge lengths
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        edge_lengths = np.hypot(edges[:, 0], edges[:, 1])
         
-        for i in range(len(vertices)):
-            face_flaps = []
-            
-            p1 = vertices[i]
-            p2 = vertices[(i + 1) % len(vertices)]
-            edge_length = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-            
-            # Alternating flap pattern: even indices get flaps on top and bottom
-            # odd indices get flaps on left and right
-            if i % 2 == 0:
-                # Top flap
-                top_flap = self._create_flap(edge_length, flap_width, 'top')
-                face_flaps.append(top_flap)
-                
-                # Bottom flap
-                bottom_flap = self._create_flap(edge_length, flap_width, 'bottom')
-                face_flaps.append(bottom_flap)
-            else:
-                # Left flap
-                left_flap = self._create_flap(height, flap_width, 'left')
-                face_flaps.append(left_flap)
-                
-                # Right flap
-                right_flap = self._create_flap(height, flap_width, 'right')
-                face_flaps.append(right_flap)
-            
-            flaps.append(face_flaps)
+        # Create a rectangle for every side face
+        face_coords = np.zeros((len(vertices), 4, 2))
+        face_coords[:, 1:3, 0] = edge_lengths[:, None]
+        face_coords[:, 2:, 1] = height
         
-        return flaps
+        return face_coords
     
-    def _create_flap(self, edge_length: float, flap_width: float, 
-                    position: str) -> Polygon:
-        """Create a flap with 30° slopes."""
+    def _generate_flaps(self, vertices: List[Tuple[float, float]], 
+                       height: float, flap_width: float) -> np.ndarray:
+        """Generate flaps for each side face with alternating pattern as an (n, 2, 4, 2) coordinate array."""
+        vertices = np.asarray(vertices, dtype=np.float64)
         slope_offset = flap_width * math.tan(math.radians(self.flap_angle))
         
-        if position == 'top':
-            coords = [
-                (slope_offset, 0),
-                (edge_length - slope_offset, 0),
-                (edge_length, -flap_width),
-                (0, -flap_width)
-            ]
-        elif position == 'bottom':
-            coords = [
-                (0, flap_width),
-                (edge_length, flap_width),
-                (edge_length - slope_offset, 0),
-                (slope_offset, 0)
-            ]
-        elif position == 'left':
-            coords = [
-                (0, slope_offset),
-                (0, edge_length - slope_offset),
-                (-flap_width, edge_length),
-                (-flap_width, 0)
-            ]
-        elif position == 'right':
-            coords = [
-                (flap_width, 0),
-                (flap_width, edge_length),
-                (0, edge_length - slope_offset),
-                (0, slope_offset)
-            ]
-        else:
-            raise ValueError(f"Invalid flap position: {position}")
-        
-        return Polygon(coords)
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        edge_lengths = np.hypot(edges[:, 0], edges[:, 1])
+        
+        # Alternating flap pattern: even indices get flaps on top and bottom
+        # along the edge, odd indices get flaps on left and right along the height
+        odd = np.arange(len(vertices)) % 2 == 1
+        lengths = np.where(odd, height, edge_lengths)
+        
+        # Top and bottom flaps with 30° slopes
+        coords = np.zeros((len(vertices), 2, 4, 2))
+        coords[:, 0, :, 0] = np.column_stack((np.full_like(lengths, slope_offset),
+                                              lengths - slope_offset, lengths,
+                                              np.zeros_like(lengths)))
+        coords[:, 0, 2:, 1] = -flap_width
+        coords[:, 1, :, 0] = np.column_stack((np.zeros_like(lengths), lengths,
+                                              lengths - slope_offset,
+                                              np.full_like(lengths, slope_offset)))
+        coords[:, 1, :2, 1] = flap_width
+        
+        # Left and right flaps are the top and bottom flaps mirrored across y = x
+        coords[odd] = coords[odd][..., ::-1]
+        
+        return coords
     
-    def _layout_net(self, base_polygon: Polygon, side_faces: List[Polygon], 
-                   flaps: List[List[Polygon]]) -> Dict:
+    def _layout_net(self, vertices: np.ndarray, side_faces: np.ndarray, 
+                   flaps: np.ndarray) -> Dict:
         """Layout the net with base and connected side faces."""
-        layout = {
-            'base': base_polygon,
-            'sides': [],
-            'flaps': []
-        }
-        
-        vertices = list(base_polygon.exterior.coords)[:-1]
-        current_x = 0
-        current_y = 0
-        
-        # Position base polygon
-        base_bounds = base_polygon.bounds
-        base_width = base_bounds[2] - base_bounds[0]
-        base_height = base_bounds[3] - base_bounds[1]
+        # Bounds of the unpositioned shapes as (min_x, min_y, max_x, max_y) rows
+        face_bounds = np.concatenate((side_faces.min(axis=1), side_faces.max(axis=1)), axis=-1)
+        flap_sizes = flaps.max(axis=2) - flaps.min(axis=2)
+        face_heights = face_bounds[:, 3] - face_bounds[:, 1]
         
         # Center the base
         base_x = self.margin
-        base_y = self.margin + max(face.bounds[3] - face.bounds[1] for face in side_faces)
-        
-        positioned_base = translate(base_polygon, base_x, base_y)
-        layout['base'] = positioned_base
-        
-        # Position side faces around the base
-        for i, (side_face, face_flaps) in enumerate(zip(side_faces, flaps)):
-            # Calculate position for this side face
-            edge_start = vertices[i]
-            edge_end = vertices[(i + 1) % len(vertices)]
-            
-            # Calculate edge vector and perpendicular
-            edge_vector = np.array([edge_end[0] - edge_start[0], 
-                                  edge_end[1] - edge_start[1]])
-            edge_length = np.linalg.norm(edge_vector)
-            edge_unit = edge_vector / edge_length if edge_length > 0 else np.array([1, 0])
-            
-            # Position side face
-            if i == 0:
-                # First side face attached to base
-                side_x = base_x + edge_start[0]
-                side_y = base_y - (side_face.bounds[3] - side_face.bounds[1])
-                
-                # Rotate to align with edge
-                angle = math.degrees(math.atan2(edge_unit[1], edge_unit[0]))
-                positioned_side = rotate(side_face, angle, origin=(0, 0))
-                positioned_side = translate(positioned_side, side_x, side_y)
-            else:
-                # Other side faces connected to previous side face
-                prev_side = layout['sides'][i-1]
-                prev_bounds = prev_side.bounds
-                
-                side_x = prev_bounds[2]  # Right edge of previous side
-                side_y = prev_bounds[1]  # Bottom edge of previous side
-                
-                positioned_side = translate(side_face, side_x, side_y)
-            
-            layout['sides'].append(positioned_side)
-            
-            # Position flaps for this side face
-            positioned_flaps = []
-            side_bounds = positioned_side.bounds
-            
-            for j, flap in enumerate(face_flaps):
-                if i % 2 == 0:  # Top/bottom flaps
-                    if j == 0:  # Top flap
-                        flap_x = side_bounds[0]
-                        flap_y = side_bounds[3]
-                    else:  # Bottom flap
-                        flap_x = side_bounds[0]
-                        flap_y = side_bounds[1] - (flap.bounds[3] - flap.bounds[1])
-                else:  # Left/right flaps
-                    if j == 0:  # Left flap
-                        flap_x = side_bounds[0] - (flap.bounds[2] - flap.bounds[0])
-                        flap_y = side_bounds[1]
-                    else:  # Right flap
-                        flap_x = side_bounds[2]
-                        flap_y = side_bounds[1]
-                
-                positioned_flap = translate(flap, flap_x, flap_y)
-                positioned_flaps.append(positioned_flap)
-            
-            layout['flaps'].extend(positioned_flaps)
-        
-        return layout
+        base_y = self.margin + face_heights.max()
+        
+        positioned_base = Shape(vertices + (base_x, base_y))
+        
+        # First side face attached to base, rotated to align with its edge
+        edge_vector = vertices[1 % len(vertices)] - vertices[0]
+        edge_length = np.linalg.norm(edge_vector)
+        edge_unit = edge_vector / edge_length if edge_length > 0 else np.array([1, 0])
+        
+        side_x = base_x + vertices[0][0]
+        side_y = base_y - face_heights[0]
+        
+        # Rotation about the origin followed by the translation, as one affine transform
+        angle = math.atan2(edge_unit[1], edge_unit[0])
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        matrix = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+        first_side = Shape(np.matmul(matrix, side_faces[0].T).T + (side_x, side_y))
+        
+        # Other side faces connected to previous side face: each starts at the
+        # right edge and bottom edge of the previous side
+        side_offsets = np.zeros((len(side_faces), 2))
+        side_bounds = np.empty((len(side_faces), 4))
+        side_bounds[0] = first_side.bounds
+        for i in range(1, len(side_faces)):
+            side_offsets[i] = side_bounds[i-1, 2], side_bounds[i-1, 1]
+            side_bounds[i] = face_bounds[i] + np.tile(side_offsets[i], 2)
+        
+        # Position flaps against their side face: top/bottom flaps on even
+        # sides, left/right flaps on odd sides
+        min_x, min_y, max_x, max_y = side_bounds.T
+        odd = (np.arange(len(side_faces)) % 2 == 1)[:, None]
+        flap_offsets = np.stack((
+            np.where(odd, np.column_stack((min_x - flap_sizes[:, 0, 0], min_y)),
+                     np.column_stack((min_x, max_y))),
+            np.where(odd, np.column_stack((max_x, min_y)),
+                     np.column_stack((min_x, min_y - flap_sizes[:, 1, 1]))),
+        ), axis=1)
+        
+        # Build every positioned shape directly from offset coordinates
+        positioned_sides = side_faces[1:] + side_offsets[1:, None, :]
+        positioned_flaps = (flaps + flap_offsets[:, :, None, :]).reshape(-1, 4, 2)
+        
+        return {
+            'base': positioned_base,
+            'sides': [first_side] + [Shape(coords) for coords in positioned_sides],
+            'flaps': [Shape(coords) for coords in positioned_flaps]
+        }
     
     def _create_svg(self, layout: Dict) -> str:
         """Create SVG string from the net layout."""
         # Calculate total bounds
         all_shapes = [layout['base']] + layout['sides'] + layout['flaps']
         
-        min_x = min(shape.bounds[0] for shape in all_shapes)
-        min_y = min(shape.bounds[1] for shape in all_shapes)
-        max_x = max(shape.bounds[2] for shape in all_shapes)
-        max_y = max(shape.bounds[3] for shape in all_shapes)
+        all_coords = np.concatenate([shape.coords for shape in all_shapes])
+        min_x, min_y = all_coords.min(axis=0)
+        max_x, max_y = all_coords.max(axis=0)
         
         width = max_x - min_x + 2 * self.margin
         height = max_y - min_y + 2 * self.margin
         
         # Create SVG
-        dwg = svgwrite.Drawing(size=(f'{width}px', f'{height}px'))
-        
-        # Add base polygon
-        base_coords = list(layout['base'].exterior.coords)
-        dwg.add(dwg.polygon(
-            points=base_coords,
-            fill='lightblue',
-            stroke='black',
-            stroke_width=1
-        ))
-        
-        # Add side faces
-        for side in layout['sides']:
-            side_coords = list(side.exterior.coords)
-            dwg.add(dwg.polygon(
-                points=side_coords,
-                fill='lightgreen',
-                stroke='black',
-                stroke_width=1
-            ))
-        
-        # Add flaps
-        for flap in layout['flaps']:
-            flap_coords = list(flap.exterior.coords)
-            dwg.add(dwg.polygon(
-                points=flap_coords,
-                fill='lightyellow',
-                stroke='black',
-                stroke_width=1,
-                stroke_dasharray='2,2'
-            ))
-        
-        return dwg.tostring()
\ No newline at end of file
+        parts = [
+            f'<svg baseProfile="full" height="{_fmt(height)}px" version="1.1" width="{_fmt(width)}px" '
+            f'xmlns="{SVG_NAMESPACE}">'
+        ]
+        
+        # Add base polygon, side faces and flaps, each group sharing its style
+        parts.append(f'<polygon {self._svg_style("lightblue")} {self._svg_points(layout["base"])} />')
+        
+        parts.append(f'<g {self._svg_style("lightgreen")}>')
+        parts.extend(f'<polygon {self._svg_points(side)} />' for side in layout['sides'])
+        parts.append('</g>')
+        
+        parts.append(f'<g {self._svg_style("lightyellow", dasharray="2,2")}>')
+        parts.extend(f'<polygon {self._svg_points(flap)} />' for flap in layout['flaps'])
+        parts.append('</g>')
+        
+        parts.append('</svg>')
+        return ''.join(parts)
+    
+    def _svg_style(self, fill: str, dasharray: Optional[str] = None) -> str:
+        """Format the fill and stroke attributes shared by a group of polygons."""
+        dash = f' stroke-dasharray="{dasharray}"' if dasharray else ''
+        return f'fill="{fill}" stroke="black"{dash} stroke-width="1"'
+    
+    def _svg_points(self, shape: Shape) -> str:
+        """Format a shape's closed ring as an SVG points attribute."""
+        ring = shape.coords.tolist()
+        ring.append(ring[0])
+        points = ' '.join(f'{_fmt(x)},{_fmt(y)}' for x, y in ring)
+        return f'points="{points}"'
@@ -1,14 +1,46 @@
 """
 SVG Parser Module
 
-Extracts line segments from SVG paths and polylines for polygon detection.
+Extracts line segments from SVG paths and polylines for polygon detection,
+together with the filled shapes used for color mapping.
 """
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict
 from pathlib import Path
-import xml.etree.ElementTree as ET
+try:
+    from lxml import etree as ET
+    _HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _HAS_LXML = False
 from svgpathtools import parse_path, Line, Path as SVGPath
 import numpy as np
+from shapely.geometry import Polygon
+
+
+# Elements carrying line segments and elements carrying filled geometry
+_SEGMENT_ELEMENTS = ('path', 'polyline', 'line')
+_FILL_ELEMENTS = ('rect', 'circle', 'polygon', 'path')
+
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+
+# Segment elements only come from the SVG namespace or no namespace; qualified tags map to local names
+_SEGMENT_TAGS = {
+    qualified: name
+    for name in _SEGMENT_ELEMENTS
+    for qualified in (f'{{{SVG_NAMESPACE}}}{name}', name)
+}
+
+# Fill elements are matched in any namespace
+_FILL_NAMES = frozenset(_FILL_ELEMENTS)
+
+# lxml tag filter covering both
+_ELEMENT_TAGS = tuple(_SEGMENT_TAGS) + tuple(f'{{*}}{name}' for name in _FILL_ELEMENTS)
+
+# Unit circle samples used to approximate SVG circles with 16-sided polygons
+_CIRCLE_ANGLES = np.linspace(0, 2*np.pi, 17)[:-1]
+_CIRCLE_COS = np.cos(_CIRCLE_ANGLES)
+_CIRCLE_SIN = np.sin(_CIRCLE_ANGLES)
 
 
 class SVGParser:
@@ -22,7 +54,12 @@ class SVGParser:
             tolerance: Tolerance for line segment approximation
         """
         self.tolerance = tolerance
-        self.line_segments: List[Tuple[complex, complex]] = []
+        self.segments: np.ndarray = np.empty((0, 2), dtype=np.complex128)
+    
+    @property
+    def line_segments(self) -> List[Tuple[complex, complex]]:
+        """Line segments of the last parse as (start_point, end_point) tuples."""
+        return [tuple(segment) for segment in self.segments.tolist()]
     
     def parse_svg(self, svg_file: Path) -> List[Tuple[complex, complex]]:
         """
@@ -34,80 +71,203 @@ class SVGParser:
         Returns:
             List of line segments as (start_point, end_point) tuples
         """
-        self.line_segments = []
+        self.parse_svg_with_colors(svg_file)
+        return self.line_segments
+    
+    def parse_svg_with_colors(self, svg_file: Path) -> Tuple[np.ndarray, List[Dict]]:
+        """
+        Parse SVG file once, extracting line segments and filled geometries.
         
-        try:
-            tree = ET.parse(svg_file)
-            root = tree.getroot()
-            
-            # Handle SVG namespace
-            namespace = {'svg': 'http://www.w3.org/2000/svg'}
-            if root.tag.startswith('{'):
-                namespace_uri = root.tag.split('}')[0][1:]
-                namespace = {'svg': namespace_uri}
+        Args:
+            svg_file: Path to SVG file
             
-            # Extract line segments from different SVG elements
-            self._extract_from_paths(root, namespace)
-            self._extract_from_polylines(root, namespace)
-            self._extract_from_lines(root, namespace)
+        Returns:
+            Tuple of (segments, svg_colors), where segments is an (N, 2) complex
+            array of (start_point, end_point) rows and svg_colors holds a
+            {'color', 'geometry', 'element'} dict for every filled shape
+        """
+        # Segments are collected per element kind so paths, polylines and lines
+        # keep their relative order
+        segments_by_element = {name: [] for name in _SEGMENT_ELEMENTS}
+        svg_colors = []
+        
+        try:
+            for elem in self._iter_elements(svg_file):
+                name = elem.tag.rpartition('}')[2]
+                
+                segment_name = _SEGMENT_TAGS.get(elem.tag)
+                if segment_name:
+                    self._extract_segments(segment_name, elem, segments_by_element[segment_name])
+                
+                if name in _FILL_NAMES:
+                    fill_color = elem.get('fill')
+                    if fill_color and fill_color != 'none':
+                        # Try to extract geometry information
+                        geometry = self._extract_element_geometry(name, elem)
+                        if geometry:
+                            svg_colors.append({
+                                'color': fill_color,
+                                'geometry': geometry,
+                                'element': elem.tag
+                            })
             
         except ET.ParseError as e:
             raise ValueError(f"Invalid SVG file: {e}")
         except Exception as e:
             raise ValueError(f"Error parsing SVG file: {e}")
         
-        return self.line_segments
+        self.segments = np.array([segment
+                                  for name in _SEGMENT_ELEMENTS
+                                  for segment in segments_by_element[name]],
+                                 dtype=np.complex128).reshape(-1, 2)
+        return self.segments, svg_colors
     
-    def _extract_from_paths(self, root: ET.Element, namespace: dict) -> None:
-        """Extract line segments from SVG path elements."""
-        path_elements = root.findall('.//svg:path', namespace) + root.findall('.//path')
-        
-        for path_elem in path_elements:
-            d_attr = path_elem.get('d')
-            if d_attr:
-                try:
-                    path = parse_path(d_attr)
-                    self._convert_path_to_segments(path)
-                except Exception:
-                    # Skip invalid paths
-                    continue
-    
-    def _extract_from_polylines(self, root: ET.Element, namespace: dict) -> None:
-        """Extract line segments from SVG polyline elements."""
-        polyline_elements = root.findall('.//svg:polyline', namespace) + root.findall('.//polyline')
-        
-        for polyline_elem in polyline_elements:
-            points_attr = polyline_elem.get('points')
-            if points_attr:
-                try:
-                    points = self._parse_points(points_attr)
-                    self._convert_points_to_segments(points)
-                except Exception:
-                    # Skip invalid polylines
-                    continue
-    
-    def _extract_from_lines(self, root: ET.Element, namespace: dict) -> None:
-        """Extract line segments from SVG line elements."""
-        line_elements = root.findall('.//svg:line', namespace) + root.findall('.//line')
-        
-        for line_elem in line_elements:
-            try:
-                x1 = float(line_elem.get('x1', 0))
-                y1 = float(line_elem.get('y1', 0))
-                x2 = float(line_elem.get('x2', 0))
-                y2 = float(line_elem.get('y2', 0))
+    def _iter_elements(self, svg_file: Path):
+        """Yield parsed elements in document order, each once its end tag is read."""
+        if _HAS_LXML:
+            # Only relevant elements are reported
+            for _, elem in ET.iterparse(str(svg_file), events=('end',), tag=_ELEMENT_TAGS):
+                yield elem
                 
-                start = complex(x1, y1)
-                end = complex(x2, y2)
+                # Free processed elements to keep memory bounded on large files
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        else:
+            for _, elem in ET.iterparse(str(svg_file), events=('end',)):
+                if elem.tag in _SEGMENT_TAGS or elem.tag.rpartition('}')[2] in _FILL_NAMES:
+                    yield elem
+                    elem.clear()
+    
+    def _extract_segments(self, name: str, elem: ET.Element,
+                          segments: List[Tuple[complex, complex]]) -> None:
+        """Append the line segments of a path, polyline or line element to segments."""
+        if name == 'path':
+            self._extract_from_path(elem, segments)
+        elif name == 'polyline':
+            self._extract_from_polyline(elem, segments)
+        else:
+            self._extract_from_line(elem, segments)
+    
+    def _extract_from_path(self, path_elem: ET.Element,
+                           segments: List[Tuple[complex, complex]]) -> None:
+        """Extract line segments from an SVG path element."""
+        d_attr = path_elem.get('d')
+        if d_attr:
+            try:
+                path = parse_path(d_attr)
+                self._convert_path_to_segments(path, segments)
+            except Exception:
+                # Skip invalid paths
+                pass
+    
+    def _extract_from_polyline(self, polyline_elem: ET.Element,
+                               segments: List[Tuple[complex, complex]]) -> None:
+        """Extract line segments from an SVG polyline element."""
+        points_attr = polyline_elem.get('points')
+        if points_attr:
+            try:
+                points = self._parse_points(points_attr)
+                self._convert_points_to_segments(points, segments)
+            except Exception:
+                # Skip invalid polylines
+                pass
+    
+    def _extract_from_line(self, line_elem: ET.Element,
+                           segments: List[Tuple[complex, complex]]) -> None:
+        """Extract a line segment from an SVG line element."""
+        try:
+            x1 = float(line_elem.get('x1', 0))
+            y1 = float(line_elem.get('y1', 0))
+            x2 = float(line_elem.get('x2', 0))
+            y2 = float(line_elem.get('y2', 0))
+            
+            start = complex(x1, y1)
+            end = complex(x2, y2)
+            
+            if abs(end - start) > self.tolerance:
+                segments.append((start, end))
                 
-                if abs(end - start) > self.tolerance:
-                    self.line_segments.append((start, end))
-                    
-            except (ValueError, TypeError):
-                # Skip invalid lines
-                continue
+        except (ValueError, TypeError):
+            # Skip invalid lines
+            pass
+    
+    def _extract_element_geometry(self, name: str, elem: ET.Element) -> Optional[Polygon]:
+        """Extract filled geometry from SVG element."""
+        try:
+            if name == 'rect':
+                return self._rect_to_polygon(elem)
+            elif name == 'circle':
+                return self._circle_to_polygon(elem)
+            elif name == 'polygon':
+                return self._svg_polygon_to_shapely(elem)
+            elif name == 'path':
+                return self._path_to_polygon(elem)
+        except Exception:
+            pass
+        
+        return None
+    
+    def _rect_to_polygon(self, rect_elem: ET.Element) -> Optional[Polygon]:
+        """Convert SVG rect to Shapely polygon."""
+        try:
+            x = float(rect_elem.get('x', 0))
+            y = float(rect_elem.get('y', 0))
+            width = float(rect_elem.get('width', 0))
+            height = float(rect_elem.get('height', 0))
+            
+            coords = [
+                (x, y),
+                (x + width, y),
+                (x + width, y + height),
+                (x, y + height)
+            ]
+            
+            return Polygon(coords)
+        except (ValueError, TypeError):
+            return None
+    
+    def _circle_to_polygon(self, circle_elem: ET.Element) -> Optional[Polygon]:
+        """Convert SVG circle to approximate Shapely polygon."""
+        try:
+            cx = float(circle_elem.get('cx', 0))
+            cy = float(circle_elem.get('cy', 0))
+            r = float(circle_elem.get('r', 0))
+            
+            # Create approximate polygon with 16 sides
+            coords = np.column_stack((cx + r*_CIRCLE_COS, cy + r*_CIRCLE_SIN))
+            
+            return Polygon(coords)
+        except (ValueError, TypeError):
+            return None
+    
+    def _svg_polygon_to_shapely(self, polygon_elem: ET.Element) -> Optional[Polygon]:
+        """Convert SVG polygon to Shapely polygon."""
+        try:
+            points_str = polygon_elem.get('points', '')
+            coords = []
+            
+            points = points_str.replace(',', ' ').split()
+            for i in range(0, len(points) - 1, 2):
+                x = float(points[i])
+                y = float(points[i + 1])
+                coords.append((x, y))
+            
+            if len(coords) >= 3:
+                return Polygon(coords)
+        except (ValueError, IndexError):
+            pass
+        
+        return None
     
-    def _convert_path_to_segments(self, path: SVGPath) -> None:
+    def _path_to_polygon(self, path_elem: ET.Element) -> Optional[Polygon]:
+        """Convert simple SVG path to Shapely polygon (basic implementation)."""
+        # This is a simplified implementation
+        # For complex paths, you might want to use svgpathtools
+        return None
+    
+    def _convert_path_to_segments(self, path: SVGPath,
+                                  segments: List[Tuple[complex, complex]]) -> None:
         """Convert SVG path to line segments."""
         for segment in path:
             if isinstance(segment, Line):
@@ -115,31 +275,41 @@ class SVGParser:
                 start = segment.start
                 end = segment.end
                 if abs(end - start) > self.tolerance:
-                    self.line_segments.append((start, end))
+                    segments.append((start, end))
             else:
                 # Approximate curves with line segments
-                self._approximate_curve_with_lines(segment)
+                self._approximate_curve_with_lines(segment, segments)
     
-    def _approximate_curve_with_lines(self, curve) -> None:
+    def _approximate_curve_with_lines(self, curve, segments: List[Tuple[complex, complex]]) -> None:
         """Approximate a curve with line segments."""
         # Sample points along the curve
         num_samples = max(10, int(curve.length() / self.tolerance))
+        ts = np.arange(1, num_samples + 1) / num_samples
         
-        prev_point = curve.start
-        for i in range(1, num_samples + 1):
-            t = i / num_samples
-            current_point = curve.point(t)
-            
-            if abs(current_point - prev_point) > self.tolerance:
-                self.line_segments.append((prev_point, current_point))
-            
-            prev_point = current_point
+        points = np.empty(num_samples + 1, dtype=np.complex128)
+        points[0] = curve.start
+        points[1:] = np.fromiter((curve.point(t) for t in ts), dtype=np.complex128, count=num_samples)
+        
+        # Keep consecutive samples that are far enough apart
+        keep = np.abs(np.diff(points)) > self.tolerance
+        segments.extend(zip(points[:-1][keep].tolist(), points[1:][keep].tolist()))
     
     def _parse_points(self, points_str: str) -> List[complex]:
         """Parse points string from polyline/polygon."""
-        points = []
         coords = points_str.replace(',', ' ').split()
         
+        try:
+            # Convert all complete coordinate pairs in one call
+            values = np.array(coords[:len(coords) & ~1], dtype=np.float64)
+        except ValueError:
+            return self._parse_points_slow(coords)
+        
+        return values.view(np.complex128).tolist()
+    
+    def _parse_points_slow(self, coords: List[str]) -> List[complex]:
+        """Parse coordinate tokens pair by pair, skipping invalid pairs."""
+        points = []
+        
         for i in range(0, len(coords) - 1, 2):
             try:
                 x = float(coords[i])
@@ -150,14 +320,14 @@ class SVGParser:
         
         return points
     
-    def _convert_points_to_segments(self, points: List[complex]) -> None:
+    def _convert_points_to_segments(self, points: List[complex],
+                                    segments: List[Tuple[complex, complex]]) -> None:
         """Convert list of points to line segments."""
-        for i in range(len(points) - 1):
-            start = points[i]
-            end = points[i + 1]
-            
-            if abs(end - start) > self.tolerance:
-                self.line_segments.append((start, end))
+        points = np.asarray(points, dtype=np.complex128)
+        starts, ends = points[:-1], points[1:]
+        
+        keep = np.abs(ends - starts) > self.tolerance
+        segments.extend(zip(starts[keep].tolist(), ends[keep].tolist()))
     
     def get_bounding_box(self) -> Tuple[float, float, float, float]:
         """
@@ -166,14 +336,11 @@ class SVGParser:
         Returns:
             Tuple of (min_x, min_y, max_x, max_y)
         """
-        if not self.line_segments:
+        if not len(self.segments):
             return (0, 0, 0, 0)
         
-        all_points = []
-        for start, end in self.line_segments:
-            all_points.extend([start, end])
-        
-        x_coords = [p.real for p in all_points]
-        y_coords = [p.imag for p in all_points]
+        x_coords = self.segments.real
+        y_coords = self.segments.imag
         
-        return (min(x_coords), min(y_coords), max(x_coords), max(y_coords))
\ No newline at end of file
+        return (float(x_coords.min()), float(y_coords.min()),
+                float(x_coords.max()), float(y_coords.max()))
\ No newline at end of file
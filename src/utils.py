@@ -6,10 +6,19 @@ import math
 from typing import Tuple, List
 import numpy as np
 
+from . import _geom_numba
+
 
 def distance_2d(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
     """Calculate Euclidean distance between two 2D points."""
-    return math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+
+
+def _distance_squared(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
+    """Calculate squared Euclidean distance between two 2D points."""
+    dx = p2[0] - p1[0]
+    dy = p2[1] - p1[1]
+    return dx * dx + dy * dy
 
 
 def angle_between_vectors(v1: Tuple[float, float], v2: Tuple[float, float]) -> float:
@@ -58,15 +67,7 @@ def polygon_area(vertices: List[Tuple[float, float]]) -> float:
     if len(vertices) < 3:
         return 0
     
-    area = 0
-    n = len(vertices)
-    
-    for i in range(n):
-        j = (i + 1) % n
-        area += vertices[i][0] * vertices[j][1]
-        area -= vertices[j][0] * vertices[i][1]
-    
-    return abs(area) / 2
+    return _geom_numba.polygon_area(np.asarray(vertices, dtype=np.float64))
 
 
 def polygon_centroid(vertices: List[Tuple[float, float]]) -> Tuple[float, float]:
@@ -74,46 +75,14 @@ def polygon_centroid(vertices: List[Tuple[float, float]]) -> Tuple[float, float]
     if len(vertices) < 3:
         return (0, 0)
     
-    area = polygon_area(vertices)
-    if area == 0:
-        return (0, 0)
-    
-    cx = 0
-    cy = 0
-    n = len(vertices)
-    
-    for i in range(n):
-        j = (i + 1) % n
-        factor = vertices[i][0] * vertices[j][1] - vertices[j][0] * vertices[i][1]
-        cx += (vertices[i][0] + vertices[j][0]) * factor
-        cy += (vertices[i][1] + vertices[j][1]) * factor
-    
-    cx /= (6 * area)
-    cy /= (6 * area)
-    
-    return (cx, cy)
+    return _geom_numba.polygon_centroid(np.asarray(vertices, dtype=np.float64))
 
 
 def is_point_in_polygon(point: Tuple[float, float], 
                        vertices: List[Tuple[float, float]]) -> bool:
     """Check if a point is inside a polygon using ray casting algorithm."""
     x, y = point
-    n = len(vertices)
-    inside = False
-    
-    p1x, p1y = vertices[0]
-    for i in range(1, n + 1):
-        p2x, p2y = vertices[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xinters:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-    
-    return inside
+    return _geom_numba.point_in_polygon(x, y, np.asarray(vertices, dtype=np.float64))
 
 
 def simplify_polygon(vertices: List[Tuple[float, float]], 
@@ -123,13 +92,15 @@ def simplify_polygon(vertices: List[Tuple[float, float]],
         return vertices
     
     simplified = [vertices[0]]
+    tolerance_squared = tolerance * tolerance
     
+    # Compare squared distances to avoid a square root per vertex
     for i in range(1, len(vertices)):
-        if distance_2d(simplified[-1], vertices[i]) > tolerance:
+        if _distance_squared(simplified[-1], vertices[i]) > tolerance_squared:
             simplified.append(vertices[i])
     
     # Check if last point is too close to first
-    if len(simplified) > 1 and distance_2d(simplified[-1], simplified[0]) <= tolerance:
+    if len(simplified) > 1 and _distance_squared(simplified[-1], simplified[0]) <= tolerance_squared:
         simplified.pop()
     
     return simplified if len(simplified) >= 3 else vertices
\ No newline at end of file
@@ -2,12 +2,15 @@
 Basic tests for the polygon prism net generator.
 """
 
+import math
 import pytest
 from pathlib import Path
 import tempfile
 import xml.etree.ElementTree as ET
-from shapely.geometry import Polygon
+import numpy as np
+from shapely.geometry import Polygon, box
 
+from src import svg_parser
 from src.svg_parser import SVGParser
 from src.geometry import GeometryProcessor
 from src.color_mapping import ColorMapper
@@ -44,6 +47,65 @@ def test_svg_parser_basic():
         svg_file.unlink()
 
 
+def test_svg_parser_foreign_namespace():
+    """Test that only SVG-namespace segments are parsed while fills match any namespace."""
+    svg_content = '''<?xml version="1.0" encoding="UTF-8"?>
+    <svg xmlns="http://www.w3.org/2000/svg" xmlns:o="urn:other" width="100" height="100">
+        <o:line x1="0" y1="10" x2="50" y2="10" stroke="black"/>
+        <line x1="0" y1="0" x2="50" y2="0" stroke="black"/>
+        <o:rect x="0" y="0" width="10" height="10" fill="blue"/>
+    </svg>'''
+    
+    svg_file = create_test_svg(svg_content)
+    
+    try:
+        parser = SVGParser(tolerance=0.1)
+        segments, svg_colors = parser.parse_svg_with_colors(svg_file)
+        
+        assert parser.line_segments == [(complex(0, 0), complex(50, 0))]
+        assert [color_info['color'] for color_info in svg_colors] == ['blue']
+        
+    finally:
+        svg_file.unlink()
+
+
+def test_svg_parser_stdlib_fallback(monkeypatch):
+    """Test that the xml.etree fallback parses the same segments and colors as lxml."""
+    svg_content = '''<?xml version="1.0" encoding="UTF-8"?>
+    <svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">
+        <g>
+            <path d="M 0 0 L 20 0 L 20 20" stroke="black"/>
+            <polyline points="0,30 10,30 10,40" stroke="black"/>
+        </g>
+        <line x1="0" y1="50" x2="50" y2="50" stroke="black"/>
+        <rect x="10" y="10" width="30" height="30" fill="red"/>
+        <circle cx="60" cy="60" r="5" fill="blue"/>
+    </svg>'''
+    
+    svg_file = create_test_svg(svg_content)
+    malformed_file = create_test_svg('<svg><line x1="0"')
+    
+    try:
+        lxml_segments, lxml_colors = SVGParser(tolerance=0.1).parse_svg_with_colors(svg_file)
+        
+        monkeypatch.setattr(svg_parser, 'ET', ET)
+        monkeypatch.setattr(svg_parser, '_HAS_LXML', False)
+        segments, svg_colors = SVGParser(tolerance=0.1).parse_svg_with_colors(svg_file)
+        
+        assert segments.tolist() == lxml_segments.tolist()
+        assert len(segments) == 5
+        assert [c['color'] for c in svg_colors] == [c['color'] for c in lxml_colors] == ['red', 'blue']
+        assert [c['element'] for c in svg_colors] == [c['element'] for c in lxml_colors]
+        assert all(c['geometry'].equals(l['geometry']) for c, l in zip(svg_colors, lxml_colors))
+        
+        with pytest.raises(ValueError, match="Invalid SVG file"):
+            SVGParser(tolerance=0.1).parse_svg(malformed_file)
+        
+    finally:
+        svg_file.unlink()
+        malformed_file.unlink()
+
+
 def test_geometry_processor_square():
     """Test polygon detection with a simple square."""
     # Create line segments for a square
@@ -61,6 +123,170 @@ def test_geometry_processor_square():
     assert all(isinstance(poly, Polygon) for poly in polygons)
 
 
+def test_split_uses_only_own_intersections():
+    """Test that a segment is not split at a nearby intersection of other segments."""
+    # A V whose apex (5, 5) lies within tolerance of, but not on, the third segment
+    segments = [
+        (complex(0, 0), complex(5, 5)),
+        (complex(5, 5), complex(10, 0)),
+        (complex(4, 5.03), complex(6, 5.03)),
+    ]
+    
+    processor = GeometryProcessor(tolerance=0.1)
+    processor.find_polygons(segments)
+    
+    assert processor.intersections.tolist() == [[5.0, 5.0]]
+    assert len(processor.intersections_by_seg[2]) == 0
+    
+    split_segments = processor._split_segments_at_intersections()
+    assert [4.0, 5.03, 6.0, 5.03] in split_segments.tolist()
+
+
+def test_t_junction_split():
+    """Test that a segment ending on another splits it at the junction."""
+    # The stem meets the bottom edge at (40, 0)
+    segments = [
+        (complex(0, 0), complex(20, 0)),
+        (complex(20, 0), complex(60, 0)),
+        (complex(40, 0), complex(40, 20)),
+        (complex(40, 20), complex(0, 100)),
+        (complex(0, 100), complex(0, 0)),
+    ]
+    
+    processor = GeometryProcessor(tolerance=0.1)
+    polygons = processor.find_polygons(segments)
+    
+    expected = Polygon([(0, 0), (40, 0), (40, 20), (0, 100)])
+    assert len(polygons) == 1
+    assert polygons[0].equals(expected)
+
+
+def test_curve_crossing_straight_edges():
+    """Test that sampled curve segments crossing square edges are intersected."""
+    svg_content = '''<?xml version="1.0" encoding="UTF-8"?>
+    <svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">
+        <path d="M 0 0 L 20 0 L 20 20 L 0 20 Z" stroke="black"/>
+        <path d="M -5 5 Q 10 30 25 5" stroke="black"/>
+    </svg>'''
+    
+    svg_file = create_test_svg(svg_content)
+    
+    try:
+        segments = SVGParser(tolerance=0.1).parse_svg(svg_file)
+        
+        processor = GeometryProcessor(tolerance=0.1)
+        processor.find_polygons(segments)
+        
+        # The four corners plus the curve crossing both vertical edges at about 40 degrees
+        intersections = processor.intersections.round(3).tolist()
+        assert intersections == [[0.0, 0.0], [0.0, 11.944], [0.0, 20.0],
+                                 [20.0, 0.0], [20.0, 11.944], [20.0, 20.0]]
+        
+    finally:
+        svg_file.unlink()
+
+
+def test_point_on_segment():
+    """Test point-on-segment checks within tolerance."""
+    processor = GeometryProcessor(tolerance=0.1)
+    segment = np.array([0.0, 0.0, 10.0, 0.0])
+    
+    assert processor._point_on_segment(np.array([5.0, 0.0]), segment)
+    assert processor._point_on_segment(np.array([10.05, 0.005]), segment)
+    assert not processor._point_on_segment(np.array([5.0, 0.5]), segment)
+    assert not processor._point_on_segment(np.array([10.5, 0.0]), segment)
+
+
+def _unit_square_segments(x: float, y: float) -> list:
+    """Return the four (x1, y1, x2, y2) edges of the unit square at (x, y)."""
+    return [[x, y, x + 1, y], [x + 1, y, x + 1, y + 1],
+            [x + 1, y + 1, x, y + 1], [x, y + 1, x, y]]
+
+
+def test_find_cycles_many_squares():
+    """Test cycle search on graphs with more cycles than a single face."""
+    processor = GeometryProcessor(tolerance=0.1)
+    
+    # Twenty disjoint unit squares
+    segments = np.array([seg for k in range(20) for seg in _unit_square_segments(2 * k, 0)])
+    cycles = processor._find_cycles_in_graph(processor._build_segment_graph(segments))
+    
+    assert len(cycles) == 20
+    assert sorted(cycle[:, 0].min() for cycle in cycles) == [2.0 * k for k in range(20)]
+    assert all(len(cycle) == 4 and
+               np.array_equal(cycle.max(axis=0) - cycle.min(axis=0), [1.0, 1.0])
+               for cycle in cycles)
+    
+    # A 5x5 lattice of unit edges: cycles only use lattice edges and never
+    # share one, so the rightmost walk from the corner claims the outer boundary
+    segments = np.array([[x, y, x + 1, y] for x in range(4) for y in range(5)] +
+                        [[x, y, x, y + 1] for x in range(5) for y in range(4)], dtype=np.float64)
+    cycles = processor._find_cycles_in_graph(processor._build_segment_graph(segments))
+    
+    lattice_edges = {frozenset(((x1, y1), (x2, y2))) for x1, y1, x2, y2 in segments.tolist()}
+    edges = [frozenset((tuple(cycle[i]), tuple(cycle[(i + 1) % len(cycle)])))
+             for cycle in cycles for i in range(len(cycle))]
+    assert len(edges) == len(set(edges))
+    assert set(edges) <= lattice_edges
+    assert [len(cycle) for cycle in cycles] == [16]
+
+
+def test_find_cycles_duplicate_edges():
+    """Test that duplicate segments share an edge id and do not form extra cycles."""
+    processor = GeometryProcessor(tolerance=0.1)
+    segments = np.array([
+        [0.0, 0.0, 1.0, 0.0],
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.0, 1.0, 0.0],
+        [1.0, 0.0, 0.0, 1.0],
+        [0.0, 1.0, 0.0, 0.0],
+    ])
+    
+    graph = processor._build_segment_graph(segments)
+    node_xy, offsets, neighbors, edge_ids = graph
+    assert len(node_xy) == 3
+    assert len(edge_ids) == 10
+    assert len(np.unique(edge_ids)) == 3
+    
+    cycles = processor._find_cycles_in_graph(graph)
+    assert len(cycles) == 1
+    assert sorted(map(tuple, cycles[0].tolist())) == [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0)]
+
+
+def test_round_point_matches_builtin_round():
+    """Test that decimal halves round like Python's round(), e.g. 0.35 -> 0.3."""
+    processor = GeometryProcessor(tolerance=0.1)
+    values = [0.35, -0.35, 0.05, 0.15, 0.25, 0.45, 1.15, 2.675, -7.85, 3.04]
+    points = np.array(values).reshape(-1, 2)
+
+    assert processor._round_point(points).ravel().tolist() == [round(v, 1) for v in values]
+
+
+def test_find_polygons_self_loop():
+    """Test that a segment collapsing onto one rounded node is ignored."""
+    processor = GeometryProcessor(tolerance=0.1)
+    square = [(0j, 10 + 0j), (10 + 0j, 10 + 10j), (10 + 10j, 10j), (10j, 0j)]
+    segments = [(0.051 + 0.051j, 0.149 + 0.149j), (0.149 + 0.149j, 5 + 5j)] + square
+
+    graph = processor._build_segment_graph(np.array([[0.051, 0.051, 0.149, 0.149]]))
+    assert len(graph[2]) == 0
+
+    polygons = processor.find_polygons(segments)
+    assert len(polygons) == 1
+    assert polygons[0].equals(Polygon([(0, 0), (10, 0), (10, 10), (0, 10)]))
+
+
+def test_sort_points_along_segment():
+    """Test that points are ordered by position along the segment, not distance from start."""
+    processor = GeometryProcessor(tolerance=0.1)
+    start, end = np.array([0.0, 0.0]), np.array([-10.0, 0.0])
+    points = np.array([[-10.0, 0.0], [-0.05, 0.0], [0.05, 0.0], [-5.0, 0.0], [-5.0, 0.0]])
+    
+    ordered = processor._sort_points_along_segment(points, start, end)
+    
+    assert ordered[:, 0].tolist() == [0.05, -0.05, -5.0, -10.0]
+
+
 def test_color_mapper_basic():
     """Test basic color mapping functionality."""
     color_mapping = {'red': 1.0, 'blue': 2.0}
@@ -76,6 +302,36 @@ def test_color_mapper_basic():
     # Test hex color conversion
     hex_rgb = mapper._hex_to_rgb('#FF0000')
     assert hex_rgb == (255, 0, 0)
+    
+    # Exact RGB match spelled differently from the mapping key
+    assert mapper._color_to_height('#ff0000') == 1.0
+    
+    # Near color within RGB distance 50 takes the closest height
+    assert mapper._color_to_height('rgb(230, 20, 20)') == 1.0
+    
+    # Far color is interpolated between the two closest mapped colors
+    d_red = math.dist((200, 0, 100), (255, 0, 0))
+    d_blue = math.dist((200, 0, 100), (0, 0, 255))
+    expected = (d_blue * 1.0 + d_red * 2.0) / (d_red + d_blue)
+    assert mapper._color_to_height('rgb(200, 0, 100)') == pytest.approx(expected)
+
+
+def test_find_polygon_colors_precedence():
+    """Test that the first containing shape wins and nearest-shape ties go to the first."""
+    def filled(color, x1, y1, x2, y2):
+        return {'color': color, 'geometry': box(x1, y1, x2, y2), 'element': 'rect'}
+    
+    svg_colors = [
+        filled('green', 30, 0, 40, 10),
+        filled('blue', 2, 2, 8, 8),
+        filled('red', 0, 0, 10, 10),
+    ]
+    
+    # Centroid (5, 5) lies in both blue and red; centroid (20, 5) is 10 from green and red
+    polygons = [box(4, 4, 6, 6), box(19, 4, 21, 6)]
+    
+    mapper = ColorMapper({'red': 1.0, 'blue': 2.0})
+    assert mapper._find_polygon_colors(polygons, svg_colors) == ['blue', 'green']
 
 
 def test_net_generator_basic():
@@ -102,6 +358,43 @@ def test_net_generator_basic():
     assert '</svg>' in svg_content
 
 
+def test_layout_net_pentagon():
+    """Test side and flap positions in the layout of an odd-sided net."""
+    # The first edge runs from (0, 0) to (3, 4), so the first side is rotated
+    pentagon = Polygon([(0, 0), (3, 4), (0, 8), (-5, 6), (-4, 1)])
+    vertices = np.asarray(pentagon.exterior.coords)[:-1]
+    height = 2.0
+    slope = np.tan(np.radians(30))
+    
+    generator = NetGenerator()
+    layout = generator._layout_net(vertices,
+                                   generator._generate_side_faces(vertices, height),
+                                   generator._generate_flaps(vertices, height, 1.0))
+    
+    assert len(layout['sides']) == 5
+    assert len(layout['flaps']) == 10
+    assert layout['base'].coords.tolist() == (vertices + (20, 22)).tolist()
+    
+    sides = [side.coords for side in layout['sides']]
+    flaps = [flap.coords for flap in layout['flaps']]
+    
+    # First side rotated onto the first edge, the next one chained to its bounds
+    np.testing.assert_allclose(sides[0], [(20, 20), (23, 24), (21.4, 25.2), (18.4, 21.2)])
+    np.testing.assert_allclose(sides[1], [(23, 20), (28, 20), (28, 22), (23, 22)])
+    np.testing.assert_allclose(sides[2], [(28, 20), (28 + np.sqrt(29), 20),
+                                          (28 + np.sqrt(29), 22), (28, 22)])
+    
+    # Top and bottom flaps of the first side
+    np.testing.assert_allclose(flaps[0], [(18.4 + slope, 25.2), (23.4 - slope, 25.2),
+                                          (23.4, 24.2), (18.4, 24.2)])
+    np.testing.assert_allclose(flaps[1], [(18.4, 20), (23.4, 20),
+                                          (23.4 - slope, 19), (18.4 + slope, 19)])
+    
+    # Left and right flaps of the second side
+    np.testing.assert_allclose(flaps[2], [(22, 20 + slope), (22, 22 - slope), (21, 22), (21, 20)])
+    np.testing.assert_allclose(flaps[3], [(29, 20), (29, 22), (28, 22 - slope), (28, 20 + slope)])
+
+
 def test_integration_simple():
     """Test integration with a simple SVG."""
     svg_content = '''<?xml version="1.0" encoding="UTF-8"?>
@@ -118,8 +411,9 @@ def test_integration_simple():
     try:
         # Parse SVG
         parser = SVGParser(tolerance=0.1)
-        segments = parser.parse_svg(svg_file)
+        segments, svg_colors = parser.parse_svg_with_colors(svg_file)
         assert len(segments) > 0
+        assert [color_info['color'] for color_info in svg_colors] == ['red']
         
         # Detect polygons
         processor = GeometryProcessor(tolerance=0.1)
@@ -129,7 +423,7 @@ def test_integration_simple():
             # Map colors
             color_mapping = {'red': 1.0, 'blue': 2.0}
             mapper = ColorMapper(color_mapping)
-            polygon_heights = mapper.map_polygon_heights(polygons, svg_file)
+            polygon_heights = mapper.map_polygon_heights(polygons, svg_colors)
             
             assert len(polygon_heights) > 0
             